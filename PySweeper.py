@@ -18,9 +18,10 @@ APPLICATION_NAME = "PySweeper"
 APPLICATION_VERSION = "1.0.0.0"
 
 import random
+import collections
 import os
-import copy
-import math
+
+import numpy as np
 
 from PyQt6.QtGui import *
 from PyQt6.QtWidgets import *
@@ -32,178 +33,230 @@ SKILL_LEVEL_BEGINNER = 8
 SKILL_LEVEL_INTERMEDIATE = 16
 SKILL_LEVEL_EXPERT = 32
 
+SKILL_LEVEL_NAMES = {
+    SKILL_LEVEL_BEGINNER : "beginner",
+    SKILL_LEVEL_INTERMEDIATE : "intermediate",
+    SKILL_LEVEL_EXPERT : "expert"
+    }
+
 MODE_NONE = 0
 MODE_SELECT = 1
 MODE_CHORD = 2
 
-################################################################################
-
-class Tile:
-    def __init__(self):
-        # Bit 0: uncovered
-        # Bit 1: mined
-        # Bit 2: flagged
-        # Bit 3: marked (?)
-        # Bit 4: exploded
-        # Bits 8-11: mine count (number of neighbouring mines)
-        self._data = 0x00
-    
-    def uncover(self):
-        self._data |= 0x01
-    
-    def uncovered(self):
-        return bool(self._data & 0x01)
-
-    def covered(self):
-        return not self.uncovered()
-
-    def mine(self):
-        self._data |= 0x02
-
-    def mined(self):
-        return self._data & 0x02
+DEFAULT_WINDOW_SIZE = QSize(800, 600)
+DEFAULT_WINDOW_POS = QPoint(0, 0)
 
-    def flag(self):
-        self._data |= 0x04
-        self.unmark()
+ICON_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "PySweeper.ico")
 
-    def unflag(self):
-        self._data &= ~0x04
+MINES_FORMAT = " Mines: {} ".format
+TIME_FORMAT = " Time: {} ".format
 
-    def flagged(self):
-        return self._data & 0x04
-
-    def mark(self):
-        self._data |= 0x08
-        self.unflag()
+################################################################################
 
-    def unmark(self):
-        self._data &= ~0x08
-        
-    def marked(self):
-        return self._data & 0x08
+# Each tile is stored as a byte in Board's state array using these bits.
+UNCOVERED = np.uint8(0x01)
+MINED = np.uint8(0x02)
+FLAGGED = np.uint8(0x04)
+MARKED = np.uint8(0x08)     # (?)
+EXPLODED = np.uint8(0x10)
 
-    def explode(self):
-        self._data |= 0x10
+def count_neighbours(a):
+    # Sum the 8 neighbours of every element of a 2D array.
+    h, w = a.shape
+    padded = np.pad(a, 1)
+    total = np.zeros_like(a)
+    for dy in range(3):
+        for dx in range(3):
+            if dy != 1 or dx != 1:
+                total += padded[dy:dy + h, dx:dx + w]
+    return total
 
-    def exploded(self):
-        return self._data & 0x10
-    
-    def set_mine_count(self, n):
-        self._data = (n << 8) | (self._data & 0xff)
-        
-    def mine_count(self):
-        return self._data >> 8
-
-    def reset(self):
-        self._data = 0x00
-        
 class Board:
     def __init__(self):
-        self._tiles = []
+        self._state = None
+        self._counts = None
+        self._labels = None
+        self._regions = []
+        # The game is over once a mine explodes or every covered tile is a
+        # flagged mine; track both so game_over() needn't scan the board.
+        self._exploded_count = 0
+        self._pending_count = 0
         self._mine_count = 10
         self.set_size(8, 8)
 
     def set_size(self, width, height):
-        self._tiles.clear()
-        for y in range(height):
-            row = []
-            for x in range(width):
-                row.append(Tile())
-            self._tiles.append(row)
+        self._state = np.zeros((height, width), dtype=np.uint8)
+        # Number of neighbouring mines for each tile.
+        self._counts = np.zeros((height, width), dtype=np.uint8)
+        # Index into _regions of the empty region each tile belongs to.
+        self._labels = np.zeros((height, width), dtype=np.int32)
+        self._regions = [None]
+        self._exploded_count = 0
+        self._pending_count = width * height
 
     def set_mine_count(self, mine_count):
         self._mine_count = mine_count
         
     def clear(self):
-        for y in range(self.height()):
-            for x in range(self.width()):
-                self._tiles[y][x].reset()
+        self._state[:] = 0
+        self._counts[:] = 0
+        self._labels[:] = 0
+        self._regions = [None]
+        self._exploded_count = 0
+        self._pending_count = self._state.size
 
     def add_mines(self, exclude_x, exclude_y):
-        
-        def is_mine(tiles, x, y):
-            if x >= 0 and x < len(tiles[0]) and \
-               y >= 0 and y < len(tiles):
-                if tiles[y][x].mined():
-                    return 1
-            return 0
-
         # ------- Add mines -------
-        n = self._mine_count
-        while n > 0:
-            x = random.randint(0, self.width() - 1)
-            y = random.randint(0, self.height() - 1)
-            # exclude_x and exclude_y are the coords of
-            # the tile the user clicked on the first time.
-            if not self._tiles[y][x].mined() and \
-               x != exclude_x and y != exclude_y:
-                self._tiles[y][x].mine()
-                n -= 1
+        # exclude_x and exclude_y are the coords of
+        # the tile the user clicked on the first time.
+        # Sample from all other tiles by skipping over the excluded index.
+        exclude = exclude_y * self.width() + exclude_x
+        picks = np.array(random.sample(range(self._state.size - 1), self._mine_count))
+        picks[picks >= exclude] += 1
+        self._state.reshape(-1)[picks] |= MINED
+        # Tiles flagged before the first click may now be flagged mines.
+        self.recount()
         # ------- Update cell mine count -------
-        for y in range(self.height()):
-            for x in range(self.width()):
-                n = 0
-                n += is_mine(self._tiles, x - 1, y - 1)
-                n += is_mine(self._tiles, x    , y - 1)
-                n += is_mine(self._tiles, x + 1, y - 1)
-                n += is_mine(self._tiles, x - 1, y    )
-                n += is_mine(self._tiles, x + 1, y    )
-                n += is_mine(self._tiles, x - 1, y + 1)
-                n += is_mine(self._tiles, x    , y + 1)
-                n += is_mine(self._tiles, x + 1, y + 1)
-                self._tiles[y][x].set_mine_count(n)
+        mines = ((self._state & MINED) != 0).astype(np.uint8)
+        self._counts[:] = count_neighbours(mines)
+        # ------- Label empty regions -------
+        # Clicking any tile of a connected group of tiles without neighbouring
+        # mines uncovers the group plus its border, so work these out once.
+        empty = (self._counts == 0) & (mines == 0)
+        for y, x in zip(*np.nonzero(empty)):
+            if self._labels[y, x]:
+                continue
+            label = len(self._regions)
+            region = np.zeros(empty.shape, dtype=np.uint8)
+            queue = collections.deque([(x, y)])
+            self._labels[y, x] = label
+            while queue:
+                tx, ty = queue.popleft()
+                region[ty, tx] = 1
+                for nx, ny in self.neighbours(tx, ty):
+                    if empty[ny, nx] and not self._labels[ny, nx]:
+                        self._labels[ny, nx] = label
+                        queue.append((nx, ny))
+            self._regions.append((region | count_neighbours(region)) != 0)
+
+    def recount(self):
+        # Rebuild the game-over counters from the state array.
+        flagged_mines = (self._state & (FLAGGED | MINED)) == (FLAGGED | MINED)
+        covered = (self._state & UNCOVERED) == 0
+        self._exploded_count = int(np.count_nonzero(self._state & EXPLODED))
+        self._pending_count = int(np.count_nonzero(covered & ~flagged_mines))
+
+    def snapshot(self):
+        return self._state.copy()
+
+    def restore(self, snapshot):
+        # Mine counts and empty regions aren't part of a snapshot, so it can
+        # only be restored during the game it was taken in.
+        self._state[:] = snapshot
+        self.recount()
 
     def mine_count(self):
         return self._mine_count
 
     def width(self):
-        return len(self._tiles[0])
+        return self._state.shape[1]
         
     def height(self):
-        return len(self._tiles)
+        return self._state.shape[0]
         
     def at(self, x, y):
-        return self._tiles[y][x]
+        return self._state[y, x]
+
+    def mine_count_at(self, x, y):
+        return int(self._counts[y, x])
 
     def is_valid_position(self, x, y):
         return x >= 0 and x < self.width() and y >= 0 and y < self.height()
 
+    def flag(self, x, y):
+        tile = self._state[y, x]
+        if tile & MINED and not tile & (UNCOVERED | FLAGGED):
+            self._pending_count -= 1
+        self._state[y, x] = (tile | FLAGGED) & ~MARKED
+
+    def unflag(self, x, y):
+        tile = self._state[y, x]
+        if tile & MINED and tile & FLAGGED and not tile & UNCOVERED:
+            self._pending_count += 1
+        self._state[y, x] = tile & ~FLAGGED
+
+    def mark(self, x, y):
+        self.unflag(x, y)
+        self._state[y, x] |= MARKED
+
+    def unmark(self, x, y):
+        self._state[y, x] &= ~MARKED
+
+    def explode(self, x, y):
+        if not self._state[y, x] & EXPLODED:
+            self._exploded_count += 1
+        self._state[y, x] |= EXPLODED
+
+    def uncover_tile(self, x, y):
+        # Uncover a single tile without flooding its neighbours.
+        if not self._state[y, x] & (UNCOVERED | FLAGGED):
+            self._pending_count -= 1
+            self._state[y, x] |= UNCOVERED
+
     def game_over(self):
-        for y in range(self.height()):
-            for x in range(self.width()):
-                tile = self._tiles[y][x]
-                if tile.exploded():
-                    return True
-        for y in range(self.height()):
-            for x in range(self.width()):
-                tile = self._tiles[y][x]
-                if tile.covered() and not (tile.flagged() and tile.mined()):
-                    return False
-        return True
+        return self._exploded_count > 0 or self._pending_count == 0
     
     def uncover(self, x, y):
-        if self.is_valid_position(x, y):
-            tile = self._tiles[y][x]
-            if tile.covered():
-                if not tile.flagged():
-                    tile.uncover()
-                    if tile.mine_count() == 0 and \
-                        not tile.mined():
-                        self.uncover(x - 1, y - 1)
-                        self.uncover(x - 0, y - 1)
-                        self.uncover(x + 1, y - 1)
-                        self.uncover(x - 1, y - 0)
-                        self.uncover(x + 1, y - 0)
-                        self.uncover(x - 1, y + 1)
-                        self.uncover(x - 0, y + 1)
-                        self.uncover(x + 1, y + 1)
+        if not self.is_valid_position(x, y) or \
+           self._state[y, x] & (UNCOVERED | FLAGGED):
+            return
+        label = self._labels[y, x]
+        if label:
+            region = self._regions[label]
+            # Flags inside the region can block the flood, so fall back to
+            # walking it tile by tile.
+            if not (self._state[region] & FLAGGED).any():
+                self._pending_count -= int(np.count_nonzero((self._state[region] & UNCOVERED) == 0))
+                self._state[region] |= UNCOVERED
+                return
+        queue = collections.deque([(x, y)])
+        while queue:
+            x, y = queue.popleft()
+            tile = self._state[y, x]
+            # The uncovered bit doubles as the visited marker.
+            if tile & (UNCOVERED | FLAGGED):
+                continue
+            self._pending_count -= 1
+            self._state[y, x] |= UNCOVERED
+            if self._counts[y, x] == 0 and not tile & MINED:
+                queue.extend(self.neighbours(x, y))
+
+    def neighbourhood(self, x, y):
+        # View of the block of up to 3x3 tiles centred on (x, y).
+        return self._state[max(y - 1, 0):y + 2, max(x - 1, 0):x + 2]
+
+    def neighbour_flag_count(self, x, y):
+        block = self.neighbourhood(x, y)
+        return int(np.count_nonzero(block & FLAGGED)) - bool(self._state[y, x] & FLAGGED)
+
+    def chord_expand(self, x, y):
+        # Split the unflagged neighbours of (x, y) into the mines a chord
+        # explodes and the tiles it uncovers.
+        x0 = max(x - 1, 0)
+        y0 = max(y - 1, 0)
+        block = self.neighbourhood(x, y)
+        unflagged = (block & FLAGGED) == 0
+        unflagged[y - y0, x - x0] = False
+        mined = (block & MINED) != 0
+        to_explode = [(x0 + bx, y0 + by) for by, bx in zip(*np.nonzero(unflagged & mined))]
+        to_uncover = [(x0 + bx, y0 + by) for by, bx in zip(*np.nonzero(unflagged & ~mined))]
+        return to_explode, to_uncover
 
     def neighbours(self, x, y):
 
         def add(self, tiles, x, y):
             if self.is_valid_position(x, y):
-                tiles.append(self._tiles[y][x])
+                tiles.append((x, y))
 
         tiles = []
         add(self, tiles, x - 1, y - 1)
@@ -226,10 +279,19 @@ class MinesweeperWidget(QWidget):
         self._grid_y = 0
         self._tile_size = 0
         self._border_width = 1
+        self._tile_rects = []
+        self._layout_key = None
+        # ------- Pixmaps (see render_pixmaps()) -------
+        self._mine_pixmap = QPixmap()
+        self._exploded_mine_pixmap = QPixmap()
+        self._wrong_mine_pixmap = QPixmap()
+        self._flag_pixmap = QPixmap()
+        self._digit_pixmaps = [QPixmap()] * 9
+        # Shared by draw_mine() and draw_flag(), which reset what they use.
+        self._pen = QPen()
         # Enable mouse move events without buttons pressed.
         self.setMouseTracking(True)
         self._board = Board()  
-        self.recalc_layout()
         self.timer_id = 0
         self.setStyleSheet("font-family: times new roman")
         self._selected_tile = (-1, -1)
@@ -248,6 +310,7 @@ class MinesweeperWidget(QWidget):
             QColorConstants.Svg.black,
             QColorConstants.Svg.lightgray
             )
+        self.recalc_layout()
         # ------- Events -------
         self.on_game_start = None
         self.on_game_end = None
@@ -264,7 +327,7 @@ class MinesweeperWidget(QWidget):
             self._board.set_size(level, 16)
             self._board.set_mine_count(99)
         self.recalc_layout()
-        self.repaint()
+        self.update()
 
     def skill_level(self):
         return self._board.width()
@@ -276,7 +339,7 @@ class MinesweeperWidget(QWidget):
         return self._board.mine_count()
     
     def mine_count_color(self, i):
-        return self._mine_count_colors[(i + 1) if self._color else 0] 
+        return self._mine_count_colors[i if self._color else 0]
 
     def set_marks(self, flag):
         self._marks = flag
@@ -286,6 +349,7 @@ class MinesweeperWidget(QWidget):
 
     def set_color(self, flag):
         self._color = flag
+        self.render_pixmaps()
 
     def color(self):
         return self._color
@@ -296,20 +360,28 @@ class MinesweeperWidget(QWidget):
     def clear(self):
         self._initialized = False
         self._board.clear()
-        self.repaint() 
+        self.update()
         
     def recalc_layout(self):
-        w = self.width() - (self._board.width() + 1) * self._border_width - \
-                2 * round(self.fontMetrics().height())
+        # Resize events often repeat the current geometry.
+        key = (self.width(), self.height(), self._board.width(), self._board.height(),
+               self.font().key(), self.devicePixelRatioF())
+        if key == self._layout_key:
+            return
+        self._layout_key = key
+        margin = 2 * round(self.fontMetrics().height())
+        w = self.width() - (self._board.width() + 1) * self._border_width - margin
         self._tile_size = w // self._board.width()
-        h = self.height() - (self._board.height() + 1) * self._border_width - \
-                2 * round(self.fontMetrics().height())
+        h = self.height() - (self._board.height() + 1) * self._border_width - margin
         if self._tile_size * self._board.height() > h:
             self._tile_size = h // self._board.height()
         self._grid_x = (self.width() - self._board.width() * (self._tile_size + \
                           self._border_width) - self._border_width) // 2
         self._grid_y = (self.height() - self._board.height() * (self._tile_size + \
                           self._border_width) - self._border_width) // 2
+        self._tile_rects = [[self.get_tile_rect(x, y) for x in range(self._board.width())]
+                            for y in range(self._board.height())]
+        self.render_pixmaps()
     
     def get_tile_rect(self, x, y):
         x = self._grid_x + (1 + x) * self._border_width + x * self._tile_size
@@ -358,7 +430,9 @@ class MinesweeperWidget(QWidget):
                 qpainter.setBrush(QBrush(QColorConstants.Black, style=Qt.BrushStyle.BDiagPattern))
                 qpainter.drawRect(rect)
         # ------- Mine -------
-        pen = QPen()        
+        pen = self._pen
+        pen.setStyle(Qt.PenStyle.SolidLine)
+        pen.setColor(QColorConstants.Black)
         qpainter.setBrush(QColorConstants.Black)
         center = QPointF(round(rect.x() + rect.width() / 2), round(rect.y() + rect.height() / 2))
         # ---- Big Protuberances ----
@@ -409,8 +483,9 @@ class MinesweeperWidget(QWidget):
             qpainter.setClipping(False)
         
     def draw_flag(self, qpainter, rect):
-        pen = QPen()
+        pen = self._pen
         pen.setStyle(Qt.PenStyle.NoPen)
+        pen.setColor(QColorConstants.Black)
         qpainter.setPen(pen)
         # ------- Flag -------
         qpainter.setBrush(QColorConstants.Red if self._color else QColorConstants.Black)
@@ -426,73 +501,115 @@ class MinesweeperWidget(QWidget):
         qpainter.setPen(pen)
         qpainter.setBrush(QColorConstants.Black)
         qpainter.drawLine(p1, p3)
-        # Create a new pen because calling setCapStyle() again doesn't seem to work.
-        pen = QPen(pen.width())
+        # ------- Base -------
+        pen.setWidth(1)
         pen.setCapStyle(Qt.PenCapStyle.SquareCap)
         qpainter.setPen(pen)
         r = QRectF(p3.x() - 0.13 * rect.width(), p3.y(), 0.13 * rect.width() * 2, 0.04 * rect.height())
         qpainter.drawRect(r)
 
-    def draw_tile_background(self, qpainter, tile, x, y, rect):
+    def render_pixmaps(self):
+        # Mines, flags and mine counts look the same on every tile, so draw
+        # them once per tile size and color setting and blit them in
+        # draw_tiles().
+
+        def render(draw):
+            ratio = self.devicePixelRatioF()
+            pixmap = QPixmap(round(size * ratio), round(size * ratio))
+            pixmap.setDevicePixelRatio(ratio)
+            pixmap.fill(QColorConstants.Transparent)
+            qpainter = QPainter(pixmap)
+            qpainter.setRenderHint(QPainter.RenderHint.SmoothPixmapTransform|QPainter.RenderHint.Antialiasing)
+            draw(qpainter, QRect(0, 0, size, size))
+            qpainter.end()
+            return pixmap
+
+        def draw_digit(qpainter, rect, i):
+            font = self.font()
+            font.setPixelSize(int(rect.height() * 0.75))
+            qpainter.setFont(font)
+            pen = QPen()
+            pen.setStyle(Qt.PenStyle.SolidLine)
+            pen.setColor(self.mine_count_color(i))
+            qpainter.setPen(pen)
+            qpainter.setBrush(self.mine_count_color(i))
+            qpainter.drawText(rect, Qt.AlignmentFlag.AlignCenter, str(i))
+
+        size = self._tile_size
+        if size <= 0:
+            self._mine_pixmap = QPixmap()
+            self._exploded_mine_pixmap = QPixmap()
+            self._wrong_mine_pixmap = QPixmap()
+            self._flag_pixmap = QPixmap()
+            self._digit_pixmaps = [QPixmap()] * 9
+            return
+        self._mine_pixmap = render(lambda qpainter, rect: self.draw_mine(qpainter, rect, False, False))
+        self._exploded_mine_pixmap = render(lambda qpainter, rect: self.draw_mine(qpainter, rect, True, False))
+        self._wrong_mine_pixmap = render(lambda qpainter, rect: self.draw_mine(qpainter, rect, False, True))
+        self._flag_pixmap = render(self.draw_flag)
+        self._digit_pixmaps = [QPixmap()] + \
+            [render(lambda qpainter, rect: draw_digit(qpainter, rect, i)) for i in range(1, 9)]
+
+    def draw_tile_background(self, qpainter, tile, x, y, rect, sx, sy, dark_brush, light_brush):
 
         def in_chord_range(x, y, sx, sy):
-            return (x == sx and y == sy) or (int(math.sqrt((sx - x) ** 2 + (sy - y) ** 2)) == 1)
+            return abs(sx - x) <= 1 and abs(sy - y) <= 1
 
         qpainter.setPen(Qt.PenStyle.NoPen)
-        if tile.covered():
-            if self._selected_tile == (-1, -1):
-                qpainter.setBrush(QPalette().dark())
+        if not tile & UNCOVERED:
+            if (sx, sy) == (-1, -1):
+                qpainter.setBrush(dark_brush)
             else:
-                if (self._mode == MODE_SELECT and self._selected_tile == (x, y)) or \
-                   (self._mode == MODE_CHORD and in_chord_range(x, y, self._selected_tile[0], \
-                                                                      self._selected_tile[1])):
-                    qpainter.setBrush(QPalette().light())
+                if (self._mode == MODE_SELECT and (sx, sy) == (x, y)) or \
+                   (self._mode == MODE_CHORD and in_chord_range(x, y, sx, sy)):
+                    qpainter.setBrush(light_brush)
                 else:
-                    qpainter.setBrush(QPalette().dark())
+                    qpainter.setBrush(dark_brush)
         else:
-            qpainter.setBrush(QPalette().light())
+            qpainter.setBrush(light_brush)
         qpainter.drawRect(rect)
             
     def draw_tiles(self, qpainter):
         qpainter.save()
         qpainter.setRenderHint(QPainter.RenderHint.SmoothPixmapTransform|QPainter.RenderHint.Antialiasing)
         # ------- Determine font height in pixels -------
-        tile_rect = self.get_tile_rect(0, 0)
+        tile_rect = self._tile_rects[0][0]
         font = qpainter.font()
         font.setPixelSize(int(tile_rect.height() * 0.75))
         qpainter.setFont(font)
         # ------- Draw tiles -------
+        game_over = self.game_over()
+        palette = QPalette()
+        dark_brush = palette.dark()
+        light_brush = palette.light()
+        sx, sy = self._selected_tile
         for y in range(self._board.height()):
             for x in range(self._board.width()):
                 tile = self._board.at(x, y)
-                rect = self.get_tile_rect(x, y)
-                self.draw_tile_background(qpainter, tile, x, y, rect)
-                if tile.covered():
-                    if self.game_over():
-                        if tile.exploded():
-                            self.draw_mine(qpainter, rect, True, False)
-                        elif tile.flagged():
-                            if tile.mined():
-                                self.draw_flag(qpainter, rect)
+                rect = self._tile_rects[y][x]
+                self.draw_tile_background(qpainter, tile, x, y, rect, sx, sy, dark_brush, light_brush)
+                if not tile & UNCOVERED:
+                    if game_over:
+                        if tile & EXPLODED:
+                            qpainter.drawPixmap(rect.topLeft(), self._exploded_mine_pixmap)
+                        elif tile & FLAGGED:
+                            if tile & MINED:
+                                qpainter.drawPixmap(rect.topLeft(), self._flag_pixmap)
                             else:
-                                self.draw_mine(qpainter, rect, False, True)
-                        elif tile.mined():
-                            self.draw_mine(qpainter, rect, False, False)
+                                qpainter.drawPixmap(rect.topLeft(), self._wrong_mine_pixmap)
+                        elif tile & MINED:
+                            qpainter.drawPixmap(rect.topLeft(), self._mine_pixmap)
                     else:
-                        if tile.flagged():
-                            self.draw_flag(qpainter, rect)
-                        elif tile.marked():
+                        if tile & FLAGGED:
+                            qpainter.drawPixmap(rect.topLeft(), self._flag_pixmap)
+                        elif tile & MARKED:
                             qpainter.setPen(Qt.PenStyle.SolidLine)
                             qpainter.setBrush(QColorConstants.Black)
                             qpainter.drawText(rect, Qt.AlignmentFlag.AlignCenter, '?')
                 else:
-                    if tile.mine_count() > 0 and tile.mine_count() <= 8:
-                        pen = QPen()
-                        pen.setStyle(Qt.PenStyle.SolidLine)
-                        pen.setColor(self.mine_count_color(tile.mine_count()))
-                        qpainter.setPen(pen)
-                        qpainter.setBrush(self.mine_count_color(tile.mine_count()))
-                        qpainter.drawText(rect, Qt.AlignmentFlag.AlignCenter, str(tile.mine_count()))
+                    mine_count = self._board.mine_count_at(x, y)
+                    if mine_count > 0 and mine_count <= 8:
+                        qpainter.drawPixmap(rect.topLeft(), self._digit_pixmaps[mine_count])
         qpainter.restore()
         
     def paintEvent(self, event):
@@ -501,11 +618,28 @@ class MinesweeperWidget(QWidget):
         #self.draw_grid(qpainter)
         self.draw_tiles(qpainter)
         
+    def selection_region(self):
+        # Area of the tiles drawn highlighted for the current selection.
+        region = QRegion()
+        sx, sy = self._selected_tile
+        if (sx, sy) != (-1, -1):
+            r = 1 if self._mode == MODE_CHORD else 0
+            for y in range(sy - r, sy + r + 1):
+                for x in range(sx - r, sx + r + 1):
+                    if self._board.is_valid_position(x, y):
+                        region = region.united(self._tile_rects[y][x])
+        return region
+
     def get_tile_at(self, posx, posy):
-        for y in range(self._board.height()):
-            for x in range(self._board.width()):
-                if self.get_tile_rect(x, y).contains(posx, posy, False):
-                    return x, y
+        # Inverse of get_tile_rect(); positions on the grid lines hit no tile.
+        if self._tile_size <= 0:
+            return -1, -1
+        stride = self._tile_size + self._border_width
+        x, dx = divmod(posx - self._grid_x - self._border_width, stride)
+        y, dy = divmod(posy - self._grid_y - self._border_width, stride)
+        if self._board.is_valid_position(x, y) and \
+           dx < self._tile_size and dy < self._tile_size:
+            return x, y
         return -1, -1
     
     def mousePressEvent(self, event):
@@ -525,22 +659,22 @@ class MinesweeperWidget(QWidget):
             self._mode = MODE_SELECT
             self._selected_tile = (tx, ty)
         elif event.button() == Qt.MouseButton.RightButton:
-            if not tile.flagged():
-                if not tile.marked():
-                    tile.flag()
+            if not tile & FLAGGED:
+                if not tile & MARKED:
+                    self._board.flag(tx, ty)
                     if self.on_flags_change:
                         self.on_flags_change(+1)
                     if self.game_over():
-                        self.end_game(tx, ty)
+                        self.end_game(False)
                 else:
-                    tile.unmark()
+                    self._board.unmark(tx, ty)
             else:
-                tile.unflag()
+                self._board.unflag(tx, ty)
                 if self.on_flags_change:
                     self.on_flags_change(-1)
                 if self.marks():
-                    tile.mark()
-        self.repaint()
+                    self._board.mark(tx, ty)
+        self.update()
         
     def mouseMoveEvent(self, event):
         if not self.game_over():
@@ -548,9 +682,12 @@ class MinesweeperWidget(QWidget):
                 x = int(event.position().x())
                 y = int(event.position().y())
                 tile = self.get_tile_at(x, y)
-                if tile != (-1, -1):
+                if tile != (-1, -1) and tile != self._selected_tile:
+                    # Only the tiles highlighted before and after the move
+                    # need to be repainted.
+                    dirty = self.selection_region()
                     self._selected_tile = tile
-                self.repaint()
+                    self.update(dirty.united(self.selection_region()))
   
     def mouseReleaseEvent(self, event):
         x = int(event.position().x())
@@ -567,34 +704,31 @@ class MinesweeperWidget(QWidget):
                         if self.on_game_start:
                             self.on_game_start()
                         self._initialized = True
-                    if tile.mined():
-                        tile.explode()
-                        self.repaint()
+                    if tile & MINED:
+                        self._board.explode(tx, ty)
+                        self.update()
                         self.end_game(True)
                     else:
                         self._board.uncover(tx, ty)
-                        self.repaint()
+                        self.update()
                         if self.game_over():
                             self.end_game(False)
                 elif self._mode == MODE_CHORD:
-                    if tile.mine_count() > 0:
-                        neighbours = self._board.neighbours(tx, ty)
-                        flag_count = sum(1 for item in neighbours if item.flagged())
-                        if flag_count == tile.mine_count():
-                            # Test only if flag count matches mine count.
-                            mismatch_found = False
-                            for neighbour in neighbours:
-                                if neighbour.mined() and not neighbour.flagged():
-                                    # Make sure _board.game_over() works.
-                                    neighbour.explode()
-                                    mismatch_found = True
-                                elif not neighbour.mined() and not neighbour.flagged():
-                                    neighbour.uncover()
-                            if mismatch_found:
-                                self.end_game(True)
+                    mine_count = self._board.mine_count_at(tx, ty)
+                    # Test only if flag count matches mine count.
+                    if mine_count > 0 and \
+                       self._board.neighbour_flag_count(tx, ty) == mine_count:
+                        to_explode, to_uncover = self._board.chord_expand(tx, ty)
+                        for nx, ny in to_explode:
+                            # Make sure _board.game_over() works.
+                            self._board.explode(nx, ny)
+                        for nx, ny in to_uncover:
+                            self._board.uncover_tile(nx, ny)
+                        if to_explode:
+                            self.end_game(True)
         self._selected_tile = (-1, -1)
         self._mode = MODE_NONE
-        self.repaint()
+        self.update()
                                
     def end_game(self, hit_mine):
         if self.on_game_end:
@@ -602,10 +736,45 @@ class MinesweeperWidget(QWidget):
             
 ################################################################################
 
+class BestTimes:
+    # Best times are kept in memory and only written to the settings by
+    # save(), so winning a game doesn't wait on settings I/O.
+
+    def __init__(self, settings):
+        self._settings = settings
+        self._times = {}
+        self._dirty = set()
+
+    def get(self, skill_level_string):
+        # Returns a (time, name) tuple, reading the settings on first use.
+        if skill_level_string not in self._times:
+            time = self._settings.value(skill_level_string + "_time", 9999999, type=int)
+            name = self._settings.value(skill_level_string + "_name", "Anonymous")
+            self._times[skill_level_string] = (time, name)
+        return self._times[skill_level_string]
+
+    def set(self, skill_level_string, time, name):
+        self._times[skill_level_string] = (time, name)
+        self._dirty.add(skill_level_string)
+
+    def reset(self):
+        for s in SKILL_LEVEL_NAMES.values():
+            self.set(s, 9999999, "Anonymous")
+
+    def save(self):
+        for s in self._dirty:
+            time, name = self._times[s]
+            self._settings.setValue(s + "_time", time)
+            self._settings.setValue(s + "_name", name)
+        self._dirty.clear()
+
+################################################################################
+
 class BestTimesDialog(QDialog):
     
-    def __init__(self):
+    def __init__(self, best_times):
         super().__init__()
+        self._best_times = best_times
         # ------- Dialog Stuff -------
         self.setWindowTitle("Fastest Mine Sweepers")
         # ------- Labels -------
@@ -644,29 +813,25 @@ class BestTimesDialog(QDialog):
         def fmt(s):
             return f"       {s}"
         
-        settings = QSettings(APPLICATION_NAME, APPLICATION_NAME)
-        self._beginner_time_label.setText(fmt(settings.value("beginner_time", "9999999")))
-        self._beginner_name_label.setText(fmt(settings.value("beginner_name", "Anonymous")))
-        self._intermediate_time_label.setText(fmt(settings.value("intermediate_time", "9999999")))
-        self._intermediate_name_label.setText(fmt(settings.value("intermediate_name", "Anonymous")))
-        self._expert_time_label.setText(fmt(settings.value("expert_time", "9999999")))
-        self._expert_name_label.setText(fmt(settings.value("expert_name", "Anonymous")))
+        time, name = self._best_times.get("beginner")
+        self._beginner_time_label.setText(fmt(time))
+        self._beginner_name_label.setText(fmt(name))
+        time, name = self._best_times.get("intermediate")
+        self._intermediate_time_label.setText(fmt(time))
+        self._intermediate_name_label.setText(fmt(name))
+        time, name = self._best_times.get("expert")
+        self._expert_time_label.setText(fmt(time))
+        self._expert_name_label.setText(fmt(name))
 
     def on_reset_scores(self):
-        settings = QSettings(APPLICATION_NAME, APPLICATION_NAME)
-        settings.setValue("beginner_time", "9999999")
-        settings.setValue("beginner_name", "Anonymous")
-        settings.setValue("intermediate_time", "9999999")
-        settings.setValue("intermediate_name", "Anonymous")
-        settings.setValue("expert_time", "9999999")
-        settings.setValue("expert_name", "Anonymous")
+        self._best_times.reset()
         self.load()
 
 ################################################################################
 
 class NewBestTimeDialog(QDialog):
     
-    def __init__(self, skill_level_string):
+    def __init__(self):
         super().__init__()
         self.setWindowFlags(
             Qt.WindowType.Dialog |
@@ -674,19 +839,15 @@ class NewBestTimeDialog(QDialog):
             Qt.WindowType.WindowTitleHint
             )
         self.setWindowTitle(APPLICATION_NAME)
-        text = f"You have the fastest time for {skill_level_string} level.\n" \
-                "Please type your name."
         # ------- VBox -------
         vbox = QVBoxLayout()
         vbox.setAlignment(Qt.AlignmentFlag.AlignTop)
         # ---- Label ----
-        label = QLabel(text)
-        label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        vbox.addWidget(label)
+        self._label = QLabel()
+        self._label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        vbox.addWidget(self._label)
         # ---- Input Box ----
         self._line_edit = QLineEdit()
-        self._line_edit.setText("Anonymous")
-        self._line_edit.selectAll()
         vbox.addWidget(self._line_edit)
         # ---- OK Button ----
         hbox = QHBoxLayout()
@@ -699,6 +860,13 @@ class NewBestTimeDialog(QDialog):
         vbox.setSizeConstraint(QLayout.SizeConstraint.SetFixedSize)
         self.setLayout(vbox)
 
+    def set_skill_level_string(self, skill_level_string):
+        # The dialog is reused, so this also resets the name.
+        self._label.setText(f"You have the fastest time for {skill_level_string} level.\n"
+                             "Please type your name.")
+        self._line_edit.setText("Anonymous")
+        self._line_edit.selectAll()
+
     def text(self):
         return self._line_edit.text()
 
@@ -713,14 +881,35 @@ class MainWindow(QMainWindow):
     def __init__(self):
         super().__init__()
         self._minesweeper_widget = MinesweeperWidget()
-        self._timer_id = None
+        self._settings = QSettings(APPLICATION_NAME, APPLICATION_NAME)
+        self._best_times = BestTimes(self._settings)
+        # Dialogs are created on first use and then reused.
+        self._best_times_dialog = None
+        self._new_best_time_dialog = None
+        self._timer = QTimer(self)
+        self._timer.setInterval(1000)
+        self._timer.setTimerType(Qt.TimerType.CoarseTimer)
+        self._timer.timeout.connect(self.on_timer)
+        # Settings changes made within half a second are written together.
+        self._save_timer = QTimer(self)
+        self._save_timer.setSingleShot(True)
+        self._save_timer.setInterval(500)
+        self._save_timer.timeout.connect(self.write_settings)
+        # Flag changes made within one event loop pass update the label once.
+        self._mines_label_timer = QTimer(self)
+        self._mines_label_timer.setSingleShot(True)
+        self._mines_label_timer.setInterval(0)
+        self._mines_label_timer.timeout.connect(self.update_mines_label)
         self._time_elapsed = 0
         self._mines_left = self._minesweeper_widget.mine_count()
+        # Status bar texts last shown.
+        self._mines_text = None
+        self._time_text = None
         self.setStyleSheet("font-size: 10pt;")
         self.init_ui()
+        self._skill_level = self._skill_level_action_group.checkedAction().data()
         self.load_settings()    # Must be called after init_ui().
         self.setWindowTitle(APPLICATION_NAME)
-        self.setWindowIcon(QIcon("PySweeper.ico"))
         self.show()
 
     def init_ui(self):
@@ -731,7 +920,6 @@ class MainWindow(QMainWindow):
         menu_bar = self.menuBar()
         # ------- Game Menu -------
         game_menu = menu_bar.addMenu("&Game")
-        #game_menu.aboutToShow.connect(self.game_menu_about_to_show)
         menu_item = QAction("&New", self)
         menu_item.setShortcut(QKeySequence(Qt.Key.Key_F2))
         menu_item.triggered.connect(self.on_game_new)
@@ -785,28 +973,34 @@ class MainWindow(QMainWindow):
         # ------- Status Bar -------
         self._mines_label = QLabel()
         self._time_label = QLabel()
-        self.statusBar().addPermanentWidget(QLabel())
         self.statusBar().addPermanentWidget(self._mines_label)
         self.statusBar().addPermanentWidget(self._time_label)
         self.update_status_bar()
 
     def update_status_bar(self):
-        self._mines_label.setText(f" Mines: {self._mines_left} ")
-        self._time_label.setText(f" Time: {self._time_elapsed} ")
+        self.update_mines_label()
+        self.update_time_label()
+
+    def update_mines_label(self):
+        # Setting a label's text lays out the status bar again, even if the
+        # text is the same, so skip texts that haven't changed.
+        mines_text = MINES_FORMAT(self._mines_left)
+        if mines_text != self._mines_text:
+            self._mines_label.setText(mines_text)
+            self._mines_text = mines_text
 
-##    def game_menu_about_to_show(self):
-##        self.beginner_action.setChecked(True)
-##        self.pass_action.setEnabled(len(self.minesweeper_widget.valid_moves) == 0) 
+    def update_time_label(self):
+        time_text = TIME_FORMAT(self._time_elapsed)
+        if time_text != self._time_text:
+            self._time_label.setText(time_text)
+            self._time_text = time_text
 
     def start_timer(self):
-        if self._timer_id != None:
-            self.killTimer(self._timer_id)
-        self._timer_id = self.startTimer(1000)
+        if not self._timer.isActive():
+            self._timer.start()
         
     def stop_timer(self):
-        if self._timer_id != None:
-            self.killTimer(self._timer_id)
-            self._timer_id = None
+        self._timer.stop()
         
     def new_game(self):
         # Mines will be added on first click.
@@ -820,7 +1014,8 @@ class MainWindow(QMainWindow):
         self.new_game()
         
     def on_game_skill_level(self, action):
-        self._minesweeper_widget.set_skill_level(action.data())
+        self._skill_level = action.data()
+        self._minesweeper_widget.set_skill_level(self._skill_level)
         self.new_game()
         
     def on_game_marks(self, s):
@@ -828,30 +1023,36 @@ class MainWindow(QMainWindow):
         
     def on_game_color(self, s):
         self._minesweeper_widget.set_color(self._color_action.isChecked())
-        self._minesweeper_widget.repaint()
+        self._minesweeper_widget.update()
         
     def on_game_best_times(self, s):
-        dialog = BestTimesDialog()
-        dialog.exec()
+        if self._best_times_dialog is None:
+            self._best_times_dialog = BestTimesDialog(self._best_times)
+        else:
+            self._best_times_dialog.load()
+        self._best_times_dialog.exec()
         
     def on_help_about(self, s):
         QMessageBox.aboutQt(self, APPLICATION_NAME)
 
     def load_settings(self):
-        settings = QSettings(APPLICATION_NAME, APPLICATION_NAME)
-        self.resize(settings.value("size", QSize(800, 600)))
-        self.move(settings.value("pos", QPoint(0, 0)))
-        self._marks_action.setChecked(settings.value("marks", "false").lower() == "true")
+        self.resize(self._settings.value("size", DEFAULT_WINDOW_SIZE))
+        self.move(self._settings.value("pos", DEFAULT_WINDOW_POS))
+        self._marks_action.setChecked(self._settings.value("marks", False, type=bool))
         self._minesweeper_widget.set_marks(self._marks_action.isChecked())
                                       
     def save_settings(self):
-        settings = QSettings(APPLICATION_NAME, APPLICATION_NAME)
-        settings.setValue("size", self.size())
-        settings.setValue("pos", self.pos())
-        settings.setValue("marks", self._marks_action.isChecked())
+        self._save_timer.start()
+
+    def write_settings(self):
+        self._save_timer.stop()
+        self._settings.setValue("size", self.size())
+        self._settings.setValue("pos", self.pos())
+        self._settings.setValue("marks", self._marks_action.isChecked())
+        self._best_times.save()
         
     def closeEvent(self, event):
-        self.save_settings()
+        self.write_settings()
 
     def on_game_start(self):
         self.start_timer()
@@ -862,34 +1063,38 @@ class MainWindow(QMainWindow):
         self.stop_timer()
         if hit_mine:
             return
-        settings = QSettings(APPLICATION_NAME, APPLICATION_NAME)
-        skill_level = self._minesweeper_widget.skill_level()
-        s = { 8 : "beginner", 16 : "intermediate", 32 : "expert" }[skill_level]
-        time = 9999999
-        try:
-            time = int(settings.value(s + "_time", "9999999"))
-        except ValueError:
-            pass
+        s = SKILL_LEVEL_NAMES[self._skill_level]
+        time, _ = self._best_times.get(s)
         if self._time_elapsed < time:
-            input_dialog = NewBestTimeDialog(s)
-            input_dialog.exec()
-            settings.setValue(s + "_name", input_dialog.text())
-            settings.setValue(s + "_time", self._time_elapsed)
+            if self._new_best_time_dialog is None:
+                self._new_best_time_dialog = NewBestTimeDialog()
+            self._new_best_time_dialog.set_skill_level_string(s)
+            self._new_best_time_dialog.exec()
+            self._best_times.set(s, self._time_elapsed, self._new_best_time_dialog.text())
+            self.save_settings()
         else:
-            mb = QMessageBox()
-            mb.setIcon(QMessageBox.Icon.Information)
-            mb.setWindowTitle(self.windowTitle())
-            mb.setText("You win!")
-            mb.setInformativeText("You uncovered all the squares without mines.")
-            mb.exec()
+            QMessageBox.information(self, self.windowTitle(),
+                                    "You win!\n\nYou uncovered all the squares without mines.")
             
     def on_flags_change(self, n):
         self._mines_left -= n
-        self.update_status_bar()
+        if not self._mines_label_timer.isActive():
+            self._mines_label_timer.start()
         
-    def timerEvent(self, event):
+    def on_timer(self):
         self._time_elapsed += 1
-        self.update_status_bar()
+        # The label is brought up to date when the window is shown again.
+        if self.isVisible() and not self.isMinimized():
+            self.update_time_label()
+
+    def showEvent(self, event):
+        self.update_time_label()
+        QMainWindow.showEvent(self, event)
+
+    def changeEvent(self, event):
+        if event.type() == QEvent.Type.WindowStateChange and not self.isMinimized():
+            self.update_time_label()
+        QMainWindow.changeEvent(self, event)
         
 ################################################################################
 
@@ -897,7 +1102,7 @@ def main():
     app = QApplication([])
     app.setApplicationName(APPLICATION_NAME)
     app.setApplicationVersion(APPLICATION_VERSION)
-    app.setWindowIcon(QIcon("PySweeper.ico"))
+    app.setWindowIcon(QIcon(ICON_PATH))
     main_window = MainWindow()
     main_window.show()
     app.exec()